@@ -1,7 +1,40 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from PIL import Image, ImageTk
+from PIL import Image, ImageStat, ImageTk
+from array import array
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import compress, islice
+from urllib.parse import parse_qs, urlencode, urlparse
+import argparse
+import bisect
+import csv
+import html
+import http.client
+import json
+import math
+import mmap
+import multiprocessing
+import os
+import queue
 import random
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # only needed for batch soil analysis
+    np = None
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
 
 # Modern color palette
 COLORS = {
@@ -17,6 +50,36 @@ COLORS = {
     "text_light": "#F7FAFC"
 }
 
+# Local analysis history
+HISTORY_DIR = os.path.join(os.path.expanduser("~"), ".farming_advisory", "history")
+EVENT_KINDS = ["soil", "forecast", "pest", "crop_advice"]
+ALERT_LIMIT = 8
+
+HistoryEvent = namedtuple("HistoryEvent", ["timestamp", "kind", "location", "label", "value"])
+
+# Bulk report export
+EXPORT_FIELDS = [
+    "farm_id", "location", "soil_type", "ph", "season",
+    "ph_status", "ph_recommendation", "fertilizer", "suitable_crops",
+    "recommended_crops", "forecast", "pest", "pest_solution", "pest_prevention", "error"
+]
+EXPORT_CHUNK_SIZE = 256
+
+# Pest image gallery
+THUMBNAIL_SIZE = (300, 300)
+IMAGE_CACHE_BUDGET = 64 * 1024 * 1024
+
+# Model artifacts: header, JSON manifest, then 64-byte aligned weight arrays
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+MODEL_MAGIC = b"FARMMODL"
+MODEL_FORMAT_VERSION = 1
+MODEL_HEADER = struct.Struct("<8sII")  # magic, format version, manifest length
+MODEL_ALIGNMENT = 64
+
+# Forecast service; unset means the built-in demo forecasts
+FORECAST_URL = os.environ.get("FARMING_FORECAST_URL")
+FORECAST_CONDITIONS = ["Sunny", "Partly cloudy", "Cloudy", "Light rain", "Heavy rain", "Thunderstorms"]
+
 
 class ModernTitleBar(tk.Frame):
     def __init__(self, parent, title, *args, **kwargs):
@@ -101,34 +164,22 @@ class FarmingAdvisorySystem:
         self.main_frame = tk.Frame(root, bg=COLORS["light_bg"])
         self.main_frame.pack(fill=tk.BOTH, expand=True)
 
-        # Load mock data
-        self.crop_db = self.load_crop_database()
-        self.soil_types = ["Sandy", "Clay", "Loamy", "Silty", "Peaty"]
-        self.pest_db = self.load_pest_database()
+        # Advisory logic, mock data and models
+        self.engine = AdvisoryEngine()
 
-        # Create GUI
-        self.create_gui()
+        # Forecasts and exports run here so network waits never block Tk
+        self.background = ThreadPoolExecutor(max_workers=4)
 
-        # Initialize models
-        self.weather_model = WeatherModel()
-        self.pest_model = PestModel()
-
-    def load_crop_database(self):
-        return {
-            "Maize": {"soil": ["Loamy", "Silty"], "rainfall": "medium", "temp_range": (18, 32)},
-            "Wheat": {"soil": ["Clay", "Loamy"], "rainfall": "low", "temp_range": (12, 25)},
-            "Rice": {"soil": ["Clay", "Silty"], "rainfall": "high", "temp_range": (20, 35)},
-            "Beans": {"soil": ["Loamy", "Sandy"], "rainfall": "medium", "temp_range": (15, 30)}
-        }
+        # Open the analysis log before the dashboard reads from it
+        try:
+            self.history = AnalysisHistory(HISTORY_DIR)
+        except HistoryLockedError as e:
+            messagebox.showerror("Error", str(e))
+            raise SystemExit(1)
 
-    def load_pest_database(self):
-        return {
-            "Aphids": {"solution": "Use neem oil or insecticidal soap", "prevention": "Encourage beneficial insects"},
-            "Cutworms": {"solution": "Apply diatomaceous earth around plants",
-                         "prevention": "Use collars around seedlings"},
-            "Powdery Mildew": {"solution": "Apply sulfur or potassium bicarbonate",
-                               "prevention": "Ensure good air circulation"}
-        }
+        # Create GUI
+        self.create_gui()
+        self.history.subscribe(self.on_history_event)
 
     def create_gui(self):
         # Create notebook style
@@ -186,7 +237,8 @@ class FarmingAdvisorySystem:
             ("Get Crop Advice", lambda: self.notebook.select(4), COLORS["success"]),
             ("Check Soil Needs", lambda: self.notebook.select(1), COLORS["warning"]),
             ("Weather Forecast", lambda: self.notebook.select(2), COLORS["accent"]),
-            ("Pest Identification", lambda: self.notebook.select(3), COLORS["danger"])
+            ("Pest Identification", lambda: self.notebook.select(3), COLORS["danger"]),
+            ("Export Reports", self.export_reports, COLORS["dark_bg"])
         ]
 
         for text, command, color in buttons:
@@ -210,12 +262,14 @@ class FarmingAdvisorySystem:
         stats_frame.pack(fill=tk.X, padx=20, pady=10)
 
         stats = [
-            ("Crops in Database", len(self.crop_db), COLORS["accent"]),
-            ("Common Pests", len(self.pest_db), COLORS["warning"]),
-            ("Soil Types", len(self.soil_types), COLORS["success"])
+            ("Soil Analyses", "soil", COLORS["warning"]),
+            ("Weather Forecasts", "forecast", COLORS["accent"]),
+            ("Pest Detections", "pest", COLORS["danger"]),
+            ("Crop Advice Given", "crop_advice", COLORS["success"])
         ]
 
-        for title, value, color in stats:
+        self.stat_labels = {}
+        for title, kind, color in stats:
             card = tk.Frame(stats_frame, bg="white", relief=tk.RAISED, borderwidth=1)
             card.pack(side=tk.LEFT, expand=True, padx=5)
 
@@ -225,11 +279,12 @@ class FarmingAdvisorySystem:
                      fg=COLORS["text"],
                      font=("Segoe UI", 9)).pack(pady=(10, 0))
 
-            tk.Label(card,
-                     text=str(value),
-                     bg="white",
-                     fg=color,
-                     font=("Segoe UI", 16, "bold")).pack(pady=(0, 10))
+            self.stat_labels[kind] = tk.Label(card,
+                                              text=str(self.history.counts[kind]),
+                                              bg="white",
+                                              fg=color,
+                                              font=("Segoe UI", 16, "bold"))
+            self.stat_labels[kind].pack(pady=(0, 10))
 
         # Recent alerts
         alert_frame = tk.LabelFrame(
@@ -242,7 +297,7 @@ class FarmingAdvisorySystem:
         )
         alert_frame.pack(fill=tk.BOTH, padx=20, pady=10, expand=True)
 
-        alert_text = tk.Text(
+        self.alert_text = tk.Text(
             alert_frame,
             bg="white",
             fg=COLORS["text"],
@@ -252,10 +307,85 @@ class FarmingAdvisorySystem:
             padx=10,
             pady=10
         )
-        alert_text.pack(fill=tk.BOTH, expand=True)
-        alert_text.insert(tk.END,
-                          "• System updated to v2.1\n• New pest database available\n• Weather API connection stable")
-        alert_text.config(state=tk.DISABLED)
+        self.alert_text.pack(fill=tk.BOTH, expand=True)
+        recent = self.history.query(limit=ALERT_LIMIT)
+        self.alerts_empty = not recent
+        if recent:
+            self.alert_text.insert(tk.END, "\n".join(self.format_alert(event) for event in recent))
+        else:
+            self.alert_text.insert(tk.END, "• No analyses recorded yet")
+        self.alert_text.config(state=tk.DISABLED)
+
+    def format_alert(self, event):
+        when = time.strftime("%d %b %H:%M", time.localtime(event.timestamp))
+        where = f" ({event.location})" if event.location else ""
+        if event.kind == "soil":
+            return f"• {when} Soil analysis: {event.label}, pH {event.value:.1f}{where}"
+        elif event.kind == "forecast":
+            return f"• {when} {event.label} forecast{where}"
+        elif event.kind == "pest":
+            return f"• {when} {event.label} detected{where}"
+        return f"• {when} Crop advice for {event.label} season{where}"
+
+    def on_history_event(self, event):
+        self.stat_labels[event.kind].config(text=str(self.history.counts[event.kind]))
+
+        # Newest alert goes on top; drop whatever falls past the limit
+        self.alert_text.config(state=tk.NORMAL)
+        if self.alerts_empty:
+            self.alert_text.delete(1.0, tk.END)
+            self.alert_text.insert(1.0, self.format_alert(event))
+            self.alerts_empty = False
+        else:
+            self.alert_text.insert(1.0, self.format_alert(event) + "\n")
+            self.alert_text.delete(f"{ALERT_LIMIT}.end", tk.END)
+        self.alert_text.config(state=tk.DISABLED)
+
+    def export_reports(self):
+        if getattr(self, "export_future", None) and not self.export_future.done():
+            messagebox.showinfo("Export", "An export is already running")
+            return
+
+        farms_path = filedialog.askopenfilename(
+            title="Select farm list",
+            filetypes=[("CSV Files", "*.csv")])
+        if not farms_path:
+            return
+        output_path = filedialog.asksaveasfilename(
+            title="Save reports as",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Printable HTML", "*.html")])
+        if not output_path:
+            return
+
+        self.export_future = self.run_in_background(
+            lambda future: self.finish_export(future, output_path),
+            export_reports, read_farms(farms_path), output_path)
+
+    def finish_export(self, future, output_path):
+        try:
+            count, errors, model = future.result()
+            message = f"Exported {count} farm reports to {output_path}"
+            if errors:
+                message += f"\n{errors} farms could not be analyzed; see the error column"
+            if model:
+                message += f"\n\nPest model:\n{model}"
+            messagebox.showinfo("Export", message)
+        except Exception as e:
+            messagebox.showerror("Error", f"Export failed: {str(e)}")
+
+    def run_in_background(self, on_done, func, *args):
+        # Runs func off the Tk thread and polls, so on_done(future) is called
+        # back on the Tk thread
+        future = self.background.submit(func, *args)
+        self.root.after(100, self.check_background, future, on_done)
+        return future
+
+    def check_background(self, future, on_done):
+        if future.done():
+            on_done(future)
+        else:
+            self.root.after(100, self.check_background, future, on_done)
 
     def create_soil_analysis_tab(self):
         tab = tk.Frame(self.notebook, bg=COLORS["light_bg"])
@@ -276,7 +406,7 @@ class FarmingAdvisorySystem:
         soil_combo = ttk.Combobox(
             input_frame,
             textvariable=self.soil_var,
-            values=self.soil_types,
+            values=self.engine.soil_types,
             font=("Segoe UI", 9),
             state="readonly"
         )
@@ -351,42 +481,14 @@ class FarmingAdvisorySystem:
             messagebox.showerror("Error", "Please select a soil type")
             return
 
-        if 6 <= ph <= 7.5:
-            ph_status = "optimal"
-        elif ph < 6:
-            ph_status = "acidic (needs lime)"
-        else:
-            ph_status = "alkaline (needs sulfur)"
-
-        suitable_crops = [crop for crop, data in self.crop_db.items()
-                          if soil_type in data["soil"]]
-
-        result = f"🌱 Soil Analysis Results 🌱\n\n"
-        result += f"🔹 Soil Type: {soil_type}\n"
-        result += f"🔹 pH Level: {ph:.1f} ({ph_status})\n\n"
-        result += "📋 Recommendations:\n"
-        result += f"• For pH adjustment: {self.get_ph_recommendation(ph)}\n"
-        result += f"• Suitable crops: {', '.join(suitable_crops)}\n"
-        result += f"• Fertilizer suggestion: {self.get_fertilizer_recommendation(soil_type, ph)}"
+        result = self.engine.format_soil_report(self.engine.analyze_soil(soil_type, ph))
 
         self.soil_result.config(state=tk.NORMAL)
         self.soil_result.delete(1.0, tk.END)
         self.soil_result.insert(tk.END, result)
         self.soil_result.config(state=tk.DISABLED)
 
-    def get_ph_recommendation(self, ph):
-        if ph < 6:
-            return "Apply agricultural lime to raise pH"
-        elif ph > 7.5:
-            return "Apply elemental sulfur to lower pH"
-        return "pH is in optimal range, no adjustment needed"
-
-    def get_fertilizer_recommendation(self, soil_type, ph):
-        if soil_type == "Sandy":
-            return "Slow-release nitrogen fertilizer"
-        elif soil_type == "Clay":
-            return "Phosphorus-rich fertilizer"
-        return "Balanced NPK fertilizer"
+        self.history.append("soil", "", soil_type, ph)  # the soil tab has no location
 
     def create_weather_tab(self):
         tab = tk.Frame(self.notebook, bg=COLORS["light_bg"])
@@ -484,26 +586,33 @@ class FarmingAdvisorySystem:
             messagebox.showerror("Error", "Please enter a location")
             return
 
-        forecast = self.weather_model.predict(location, period)
+        self.forecast_text.config(state=tk.NORMAL)
+        self.forecast_text.delete(1.0, tk.END)
+        self.forecast_text.insert(tk.END, f"Fetching {period} forecast for {location}...")
+        self.forecast_text.config(state=tk.DISABLED)
+
+        self.run_in_background(
+            lambda future: self.show_weather_forecast(future, location, period),
+            self.engine.weather_report, location, period)
+
+    def show_weather_forecast(self, future, location, period):
+        try:
+            forecast, recommendations = future.result()
+        except ForecastError as e:
+            messagebox.showerror("Error", f"Weather forecast failed: {str(e)}")
+            return
 
         self.forecast_text.config(state=tk.NORMAL)
         self.forecast_text.delete(1.0, tk.END)
         self.forecast_text.insert(tk.END, forecast)
         self.forecast_text.config(state=tk.DISABLED)
 
-        recommendations = self.generate_weather_recommendations(forecast)
         self.weather_recommendations.config(state=tk.NORMAL)
         self.weather_recommendations.delete(1.0, tk.END)
         self.weather_recommendations.insert(tk.END, recommendations)
         self.weather_recommendations.config(state=tk.DISABLED)
 
-    def generate_weather_recommendations(self, forecast):
-        if "heavy rain" in forecast.lower():
-            return "⚠️ Weather Alert: Heavy Rain Expected ⚠️\n\nRecommendations:\n• Delay planting until after heavy rains\n• Ensure proper drainage in fields\n• Consider cover crops to prevent erosion"
-        elif "drought" in forecast.lower():
-            return "⚠️ Weather Alert: Drought Conditions ⚠️\n\nRecommendations:\n• Select drought-resistant crops\n• Implement water conservation techniques\n• Consider mulching to retain soil moisture"
-        else:
-            return "✅ Weather Conditions Normal\n\nRecommendations:\n• Proceed with normal planting schedule\n• Monitor local weather updates"
+        self.history.append("forecast", location, period)
 
     def create_pest_id_tab(self):
         tab = tk.Frame(self.notebook, bg=COLORS["light_bg"])
@@ -520,12 +629,45 @@ class FarmingAdvisorySystem:
                  font=("Segoe UI", 9)).pack(anchor="w")
 
         self.image_path = tk.StringVar()
+        self.gallery = []
+        self.gallery_index = 0
+        self.image_cache = ImageCache()
+        self.prefetch_polling = False
+
+        gallery_bar = tk.Frame(upload_frame, bg=COLORS["light_bg"])
+        gallery_bar.pack(pady=5)
+
+        prev_btn = ModernButton(
+            gallery_bar,
+            text="◀",
+            width=3,
+            command=lambda: self.show_gallery_image(self.gallery_index - 1)
+        )
+        prev_btn.pack(side=tk.LEFT, padx=5)
+
         upload_btn = ModernButton(
-            upload_frame,
-            text="Select Image",
+            gallery_bar,
+            text="Select Images",
             command=self.upload_image
         )
-        upload_btn.pack(pady=5)
+        upload_btn.pack(side=tk.LEFT, padx=5)
+
+        next_btn = ModernButton(
+            gallery_bar,
+            text="▶",
+            width=3,
+            command=lambda: self.show_gallery_image(self.gallery_index + 1)
+        )
+        next_btn.pack(side=tk.LEFT, padx=5)
+
+        self.gallery_status = tk.Label(
+            upload_frame,
+            text="",
+            bg=COLORS["light_bg"],
+            fg=COLORS["text"],
+            font=("Segoe UI", 8)
+        )
+        self.gallery_status.pack()
 
         # Image display
         self.image_label = tk.Label(
@@ -569,46 +711,80 @@ class FarmingAdvisorySystem:
         self.pest_result.insert(tk.END, "Pest/disease identification results will appear here.")
         self.pest_result.config(state=tk.DISABLED)
 
+        self.model_status = tk.Label(
+            result_frame,
+            text=self.engine.pest_model.describe(),
+            bg=COLORS["light_bg"],
+            fg=COLORS["text"],
+            font=("Segoe UI", 8),
+            justify=tk.LEFT
+        )
+        self.model_status.pack(anchor="w", pady=(5, 0))
+
     def upload_image(self):
-        filepath = filedialog.askopenfilename(
+        filepaths = filedialog.askopenfilenames(
             filetypes=[("Image Files", "*.jpg *.jpeg *.png")])
-        if filepath:
-            self.image_path.set(filepath)
-            self.display_image(filepath)
+        if filepaths:
+            self.gallery = list(filepaths)
+            self.show_gallery_image(0)
+
+    def show_gallery_image(self, index):
+        if not self.gallery:
+            return
+
+        self.gallery_index = index % len(self.gallery)
+        filepath = self.gallery[self.gallery_index]
+        self.image_path.set(filepath)
+
+        # Decode the neighbours in the background so flipping stays instant
+        neighbours = [self.gallery[(self.gallery_index + step) % len(self.gallery)] for step in (1, -1)]
+        self.image_cache.focus(filepath, [path for path in neighbours if path != filepath])
+        self.display_image(filepath)
+
+        if not self.prefetch_polling:
+            self.prefetch_polling = True
+            self.root.after(100, self.collect_prefetched)
+
+    def collect_prefetched(self):
+        self.image_cache.collect()
+        self.update_gallery_status()
+        if self.image_cache.pending:
+            self.root.after(100, self.collect_prefetched)
+        else:
+            self.prefetch_polling = False
+
+    def update_gallery_status(self):
+        megabyte = 1024 * 1024
+        self.gallery_status.config(
+            text=f"Image {self.gallery_index + 1} of {len(self.gallery)} • "
+                 f"{len(self.image_cache.entries)} cached, "
+                 f"{self.image_cache.nbytes / megabyte:.1f} of {self.image_cache.budget / megabyte:.0f} MB")
 
     def display_image(self, filepath):
         try:
-            img = Image.open(filepath)
-            img.thumbnail((300, 300))
-            photo = ImageTk.PhotoImage(img)
+            photo = self.image_cache.get_photo(filepath)
             self.image_label.config(image=photo)
             self.image_label.image = photo
             self.image_label.config(text="")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load image: {str(e)}")
+        self.update_gallery_status()
 
     def identify_pest(self):
         if not self.image_path.get():
             messagebox.showerror("Error", "Please select an image first")
             return
 
-        prediction = self.pest_model.predict(self.image_path.get())
+        report = self.engine.identify_pest(self.image_path.get())
+        result = self.engine.format_pest_report(report)
 
         self.pest_result.config(state=tk.NORMAL)
         self.pest_result.delete(1.0, tk.END)
-
-        if prediction in self.pest_db:
-            info = self.pest_db[prediction]
-            result = f"🔍 Identification: {prediction}\n\n"
-            result += f"💊 Solution:\n{info['solution']}\n\n"
-            result += f"🛡️ Prevention:\n{info['prevention']}"
-        else:
-            result = f"🔍 Identification: {prediction}\n\n"
-            result += "ℹ️ No specific information found in database.\n"
-            result += "Please contact your agricultural extension officer for assistance."
-
         self.pest_result.insert(tk.END, result)
         self.pest_result.config(state=tk.DISABLED)
+        self.model_status.config(text=self.engine.pest_model.describe())
+
+        self.history.append("pest", "", report["pest"])  # the pest tab has no location
 
     def create_crop_advice_tab(self):
         tab = tk.Frame(self.notebook, bg=COLORS["light_bg"])
@@ -644,7 +820,7 @@ class FarmingAdvisorySystem:
         soil_combo = ttk.Combobox(
             input_frame,
             textvariable=self.crop_soil_var,
-            values=self.soil_types,
+            values=self.engine.soil_types,
             font=("Segoe UI", 9),
             state="readonly"
         )
@@ -701,12 +877,185 @@ class FarmingAdvisorySystem:
             return
 
         location = self.crop_location_var.get()
-        forecast = self.weather_model.predict(location, "Seasonal")
-
         soil_type = self.crop_soil_var.get()
-        ph = 6.5  # Default for demo
         season = self.season_var.get()
 
+        self.crop_advice_text.config(state=tk.NORMAL)
+        self.crop_advice_text.delete(1.0, tk.END)
+        self.crop_advice_text.insert(tk.END, f"Preparing crop advice for {location}...")
+        self.crop_advice_text.config(state=tk.DISABLED)
+
+        self.run_in_background(
+            lambda future: self.show_crop_advice(future, location, season),
+            self.engine.crop_advice, location, soil_type, season)
+
+    def show_crop_advice(self, future, location, season):
+        try:
+            report = future.result()
+        except ForecastError as e:
+            messagebox.showerror("Error", f"Weather forecast failed: {str(e)}")
+            return
+        advice = self.engine.format_crop_advice(report)
+
+        self.crop_advice_text.config(state=tk.NORMAL)
+        self.crop_advice_text.delete(1.0, tk.END)
+        self.crop_advice_text.insert(tk.END, advice)
+        self.crop_advice_text.config(state=tk.DISABLED)
+
+        self.history.append("crop_advice", location, season, report["ph"])
+
+
+class AdvisoryEngine:
+    # Tk-free advisory logic, shared by the GUI and bulk report export
+    def __init__(self, weather_model=None, pest_model=None):
+        self.crop_db = self.load_crop_database()
+        self.soil_types = ["Sandy", "Clay", "Loamy", "Silty", "Peaty"]
+        self.pest_db = self.load_pest_database()
+
+        # Initialize models; weights are only mapped in on first predict
+        self.weather_model = weather_model or WeatherModel(ForecastClient(FORECAST_URL) if FORECAST_URL else None)
+        self.pest_model = pest_model or PestModel(os.path.join(MODEL_DIR, "pest_model.bin"))
+
+        self.batch_tables = None
+
+    def load_crop_database(self):
+        return {
+            "Maize": {"soil": ["Loamy", "Silty"], "rainfall": "medium", "temp_range": (18, 32)},
+            "Wheat": {"soil": ["Clay", "Loamy"], "rainfall": "low", "temp_range": (12, 25)},
+            "Rice": {"soil": ["Clay", "Silty"], "rainfall": "high", "temp_range": (20, 35)},
+            "Beans": {"soil": ["Loamy", "Sandy"], "rainfall": "medium", "temp_range": (15, 30)}
+        }
+
+    def load_pest_database(self):
+        return {
+            "Aphids": {"solution": "Use neem oil or insecticidal soap", "prevention": "Encourage beneficial insects"},
+            "Cutworms": {"solution": "Apply diatomaceous earth around plants",
+                         "prevention": "Use collars around seedlings"},
+            "Powdery Mildew": {"solution": "Apply sulfur or potassium bicarbonate",
+                               "prevention": "Ensure good air circulation"}
+        }
+
+    def analyze_soil(self, soil_type, ph):
+        if 6 <= ph <= 7.5:
+            ph_status = "optimal"
+        elif ph < 6:
+            ph_status = "acidic (needs lime)"
+        else:
+            ph_status = "alkaline (needs sulfur)"
+
+        return {
+            "soil_type": soil_type,
+            "ph": ph,
+            "ph_status": ph_status,
+            "ph_recommendation": self.get_ph_recommendation(ph),
+            "suitable_crops": [crop for crop, data in self.crop_db.items()
+                               if soil_type in data["soil"]],
+            "fertilizer": self.get_fertilizer_recommendation(soil_type, ph)
+        }
+
+    def format_soil_report(self, report):
+        result = f"🌱 Soil Analysis Results 🌱\n\n"
+        result += f"🔹 Soil Type: {report['soil_type']}\n"
+        result += f"🔹 pH Level: {report['ph']:.1f} ({report['ph_status']})\n\n"
+        result += "📋 Recommendations:\n"
+        result += f"• For pH adjustment: {report['ph_recommendation']}\n"
+        result += f"• Suitable crops: {', '.join(report['suitable_crops'])}\n"
+        result += f"• Fertilizer suggestion: {report['fertilizer']}"
+        return result
+
+    def analyze_soil_batch(self, ph, soil_codes):
+        # Vectorized analyze_soil for bulk lab uploads. soil_codes index
+        # soil_types (anything out of range counts as an unknown soil). Returns
+        # code arrays that decode through the lists in soil_batch_tables().
+        if np is None:
+            raise RuntimeError("Batch soil analysis requires NumPy")
+        tables = self.soil_batch_tables()
+
+        ph = np.asarray(ph, dtype=np.float64)
+        soil_codes = np.asarray(soil_codes)
+        unknown = len(self.soil_types)
+        soil_codes = np.where((soil_codes >= 0) & (soil_codes < unknown), soil_codes, unknown)
+
+        # 0 = no adjustment, 1 = lime, 2 = sulfur. The status codes line up,
+        # except NaN, which the scalar comparisons treat as alkaline.
+        ph_recommendation = (ph < 6).view(np.uint8) | ((ph > 7.5).view(np.uint8) << 1)
+        ph_status = ph_recommendation | (np.isnan(ph).view(np.uint8) << 1)
+
+        return {
+            "ph_status": ph_status,
+            "ph_recommendation": ph_recommendation,
+            "fertilizer": tables["fertilizer_codes"].take(soil_codes),
+            "suitable_crops": tables["crop_masks"].take(soil_codes)
+        }
+
+    def soil_batch_tables(self):
+        # Lookup tables derived from the scalar rules so both paths agree.
+        # Fertilizer only depends on soil type, so it reduces to a per-soil table.
+        if self.batch_tables is None:
+            soils = self.soil_types + [""]
+            fertilizers = [self.get_fertilizer_recommendation(soil, None) for soil in soils]
+            fertilizer_names = list(dict.fromkeys(fertilizers))
+            crops = list(self.crop_db)
+            self.batch_tables = {
+                "ph_statuses": [self.analyze_soil("", ph)["ph_status"] for ph in (6.5, 5.0, 8.0)],
+                "ph_recommendations": [self.get_ph_recommendation(ph) for ph in (6.5, 5.0, 8.0)],
+                "fertilizers": fertilizer_names,
+                "crops": crops,
+                "fertilizer_codes": np.array([fertilizer_names.index(f) for f in fertilizers], dtype=np.uint8),
+                "crop_masks": np.array([sum(1 << bit for bit, crop in enumerate(crops)
+                                            if soil in self.crop_db[crop]["soil"])
+                                        for soil in soils], dtype=np.uint32)
+            }
+        return self.batch_tables
+
+    def get_ph_recommendation(self, ph):
+        if ph < 6:
+            return "Apply agricultural lime to raise pH"
+        elif ph > 7.5:
+            return "Apply elemental sulfur to lower pH"
+        return "pH is in optimal range, no adjustment needed"
+
+    def get_fertilizer_recommendation(self, soil_type, ph):
+        if soil_type == "Sandy":
+            return "Slow-release nitrogen fertilizer"
+        elif soil_type == "Clay":
+            return "Phosphorus-rich fertilizer"
+        return "Balanced NPK fertilizer"
+
+    def weather_report(self, location, period):
+        forecast = self.weather_model.predict(location, period)
+        return forecast, self.generate_weather_recommendations(forecast)
+
+    def generate_weather_recommendations(self, forecast):
+        if "heavy rain" in forecast.lower():
+            return "⚠️ Weather Alert: Heavy Rain Expected ⚠️\n\nRecommendations:\n• Delay planting until after heavy rains\n• Ensure proper drainage in fields\n• Consider cover crops to prevent erosion"
+        elif "drought" in forecast.lower():
+            return "⚠️ Weather Alert: Drought Conditions ⚠️\n\nRecommendations:\n• Select drought-resistant crops\n• Implement water conservation techniques\n• Consider mulching to retain soil moisture"
+        else:
+            return "✅ Weather Conditions Normal\n\nRecommendations:\n• Proceed with normal planting schedule\n• Monitor local weather updates"
+
+    def identify_pest(self, image_path):
+        prediction = self.pest_model.predict(image_path)
+        info = self.pest_db.get(prediction, {})
+        return {
+            "pest": prediction,
+            "solution": info.get("solution"),
+            "prevention": info.get("prevention")
+        }
+
+    def format_pest_report(self, report):
+        result = f"🔍 Identification: {report['pest']}\n\n"
+        if report["solution"]:
+            result += f"💊 Solution:\n{report['solution']}\n\n"
+            result += f"🛡️ Prevention:\n{report['prevention']}"
+        else:
+            result += "ℹ️ No specific information found in database.\n"
+            result += "Please contact your agricultural extension officer for assistance."
+        return result
+
+    def crop_advice(self, location, soil_type, season, ph=6.5):  # Default pH for demo
+        forecast = self.weather_model.predict(location, "Seasonal")
+
         suitable_crops = []
         for crop, data in self.crop_db.items():
             if (soil_type in data["soil"] and
@@ -714,26 +1063,32 @@ class FarmingAdvisorySystem:
                     self.is_season_suitable(season, crop)):
                 suitable_crops.append(crop)
 
-        advice = f"🌾 Comprehensive Crop Advice for {location} 🌾\n\n"
-        advice += f"📌 Location: {location}\n"
-        advice += f"🌱 Soil Type: {soil_type}\n"
-        advice += f"🌦️ Season: {season}\n\n"
+        return {
+            "location": location,
+            "soil_type": soil_type,
+            "season": season,
+            "ph": ph,
+            "forecast": forecast,
+            "crops": suitable_crops
+        }
+
+    def format_crop_advice(self, report):
+        advice = f"🌾 Comprehensive Crop Advice for {report['location']} 🌾\n\n"
+        advice += f"📌 Location: {report['location']}\n"
+        advice += f"🌱 Soil Type: {report['soil_type']}\n"
+        advice += f"🌦️ Season: {report['season']}\n\n"
         advice += "📡 Weather Outlook:\n"
-        advice += forecast + "\n\n"
+        advice += report["forecast"] + "\n\n"
         advice += "✅ Recommended Crops:\n"
 
-        if suitable_crops:
-            for crop in suitable_crops:
+        if report["crops"]:
+            for crop in report["crops"]:
                 advice += f"\n⭐ {crop}:\n"
                 advice += f"   • {self.get_crop_details(crop)}\n"
         else:
             advice += "No suitable crops found for current conditions.\n"
             advice += "Consider adjusting soil parameters or selecting different season."
-
-        self.crop_advice_text.config(state=tk.NORMAL)
-        self.crop_advice_text.delete(1.0, tk.END)
-        self.crop_advice_text.insert(tk.END, advice)
-        self.crop_advice_text.config(state=tk.DISABLED)
+        return advice
 
     def is_ph_suitable(self, ph, crop):
         return 5.5 <= ph <= 7.5  # Simplified for demo
@@ -751,7 +1106,19 @@ class FarmingAdvisorySystem:
 
 
 class WeatherModel:
+    def __init__(self, client=None):
+        self.client = client
+
     def predict(self, location, period):
+        if self.client is not None:
+            payload = self.client.get_forecast(location, period)
+            if not payload:
+                return "Forecast not available"
+            try:
+                return self.format_forecast(location, period, payload)
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                raise ForecastError(f"Malformed {period} forecast for {location}: {e!r}")
+
         forecasts = {
             "7-day": f"Weather forecast for {location} next 7 days:\n"
                      "• Day 1: Sunny, 28°C\n• Day 2: Partly cloudy, 26°C\n"
@@ -767,14 +1134,1002 @@ class WeatherModel:
         }
         return forecasts.get(period, "Forecast not available")
 
+    def format_forecast(self, location, period, payload):
+        if period == "Seasonal":
+            return (f"Seasonal outlook for {location}:\n"
+                    f"Expected {payload['rainfall']} this season.\n"
+                    f"Temperatures will be {payload['temperature']}.")
+
+        days = payload["days"]
+        if period == "14-day":
+            def summary(week):
+                conditions = ", ".join(dict.fromkeys(day["condition"] for day in week))
+                temps = [day["temp"] for day in week]
+                return f"{conditions}, temps {min(temps)}-{max(temps)}°C"
+
+            return (f"14-day forecast for {location}:\n"
+                    f"First week: {summary(days[:7])}\n"
+                    f"Second week: {summary(days[7:])}")
+
+        lines = [f"• Day {number}: {day['condition']}, {day['temp']}°C"
+                 for number, day in enumerate(days, 1)]
+        return f"Weather forecast for {location} next {len(days)} days:\n" + "\n".join(lines)
+
+
+class ForecastError(Exception):
+    pass
+
+
+class ForecastClient:
+    # Keeps a small pool of keep-alive connections to the forecast service and
+    # retries timeouts, dropped connections and 5xx replies with backoff.
+    def __init__(self, base_url, timeout=2.0, retries=2, backoff=0.1, pool_size=8):
+        url = urlparse(base_url)
+        if url.scheme == "https":
+            self.connection_class = http.client.HTTPSConnection
+        elif url.scheme == "http":
+            self.connection_class = http.client.HTTPConnection
+        else:
+            raise ValueError(f"Unsupported forecast service URL: {base_url}")
+        self.host = url.hostname
+        self.port = url.port
+        self.base_path = url.path.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.pool = queue.LifoQueue()
+
+    def connection(self):
+        # Returns the connection and whether it came out of the pool
+        try:
+            return self.pool.get_nowait(), True
+        except queue.Empty:
+            return self.connection_class(self.host, self.port, timeout=self.timeout), False
+
+    def release(self, conn):
+        if self.pool.qsize() < self.pool_size:
+            self.pool.put_nowait(conn)
+        else:
+            conn.close()
+
+    def send(self, path):
+        # A pooled connection may have been closed by the server while idle.
+        # That says nothing about the service, so move on to the next one,
+        # ending on a fresh connection, without spending a retry.
+        while True:
+            conn, reused = self.connection()
+            try:
+                conn.request("GET", path)
+                response = conn.getresponse()
+                return conn, response, response.read()
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                # RemoteDisconnected is a ConnectionResetError
+                if not reused or not isinstance(e, (ConnectionResetError, BrokenPipeError)):
+                    raise
+
+    def get_forecast(self, location, period):
+        path = f"{self.base_path}/forecast?{urlencode({'location': location, 'period': period})}"
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+
+            try:
+                conn, response, body = self.send(path)
+            except (OSError, http.client.HTTPException) as e:
+                error = e
+                continue
+
+            if response.will_close:
+                conn.close()
+            else:
+                self.release(conn)
+
+            if response.status == 404:
+                return None
+            if response.status >= 500:
+                error = f"HTTP {response.status}"
+                continue
+            if response.status != 200:
+                raise ForecastError(f"Forecast service returned HTTP {response.status}")
+            try:
+                return json.loads(body)
+            except ValueError:
+                raise ForecastError("Forecast service returned invalid JSON")
+
+        raise ForecastError(f"Forecast service unavailable after {self.retries + 1} attempts ({error})")
+
+
+class ForecastServer(ThreadingHTTPServer):
+    # Local stand-in for the forecast service. Serves recorded forecasts when
+    # it has them and deterministic synthetic ones otherwise, with injectable
+    # latency and failures for testing and load runs.
+    daemon_threads = True
+    request_queue_size = 128  # the default of 5 drops connects under load
+
+    def __init__(self, address, latency=0.0, jitter=0.0, error_rate=0.0, recorded=None):
+        super().__init__(address, ForecastRequestHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.recorded = {}
+        if recorded:
+            with open(recorded, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        payload = json.loads(line)
+                        self.recorded[(payload["location"], payload["period"])] = payload
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def forecast(self, location, period):
+        if (location, period) in self.recorded:
+            return self.recorded[(location, period)]
+
+        rng = random.Random(zlib.crc32(f"{location}|{period}".encode("utf-8")))
+        if period == "Seasonal":
+            return {
+                "location": location,
+                "period": period,
+                "rainfall": rng.choice(["above-average rainfall", "average rainfall",
+                                        "below-average rainfall", "drought conditions"]),
+                "temperature": rng.choice(["slightly higher than normal", "near normal",
+                                           "slightly lower than normal"])
+            }
+
+        days = {"7-day": 7, "14-day": 14}.get(period)
+        if days is None:
+            return None
+        base = rng.randint(20, 28)
+        return {
+            "location": location,
+            "period": period,
+            "days": [{"condition": rng.choice(FORECAST_CONDITIONS), "temp": base + rng.randint(-4, 4)}
+                     for _ in range(days)]
+        }
+
+
+class ForecastRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so client pooling is exercised
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/forecast":
+            self.send_json(404, {"error": "not found"})
+            return
+
+        query = parse_qs(url.query)
+        server = self.server
+        delay = server.latency + random.uniform(-server.jitter, server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if random.random() < server.error_rate:
+            self.send_json(503, {"error": "injected failure"})
+            return
+
+        payload = server.forecast(query.get("location", [""])[0], query.get("period", [""])[0])
+        if payload is None:
+            self.send_json(404, {"error": "forecast not available"})
+        else:
+            self.send_json(200, payload)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # one line per request would swamp a load test
+
+
+def read_trace(path):
+    # JSON lines of {"location": ..., "period": ...}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None  # replayed as a failed request
+
+
+def replay_trace(trace, engine, concurrency=8):
+    # Pushes each recorded request through the same forecast and
+    # recommendation path as the Weather tab, as fast as the workers allow
+    requests = iter(trace)
+    lock = threading.Lock()
+    latencies = array("d")
+    errors = [0]
+    finished = object()
+
+    def worker():
+        while True:
+            with lock:
+                request = next(requests, finished)
+            if request is finished:
+                return
+            start = time.perf_counter()
+            try:
+                engine.weather_report(request["location"], request["period"])
+                failed = False
+            except Exception:
+                failed = True  # a bad trace line or reply is one failed request
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                errors[0] += failed
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    ordered = sorted(latencies)
+
+    def percentile(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+    return {
+        "requests": len(ordered),
+        "errors": errors[0],
+        "seconds": elapsed,
+        "throughput": len(ordered) / elapsed if elapsed else 0.0,
+        "p50": percentile(0.50),
+        "p90": percentile(0.90),
+        "p99": percentile(0.99),
+        "p999": percentile(0.999),
+        "max": ordered[-1] if ordered else 0.0
+    }
+
 
 class PestModel:
+    def __init__(self, artifact_path=None):
+        self.artifact_path = artifact_path
+        self.artifact = None
+
+    def load(self):
+        if self.artifact is None and self.artifact_path and os.path.exists(self.artifact_path):
+            self.artifact = ModelArtifact(self.artifact_path)
+        return self.artifact
+
+    def image_features(self, image_path):
+        # Per-channel mean and spread of a small RGB copy, scaled to 0..1
+        with Image.open(image_path) as img:
+            img.draft("RGB", (64, 64))
+            stat = ImageStat.Stat(img.convert("RGB").resize((64, 64)))
+        return [value / 255 for value in stat.mean + stat.stddev]
+
+    def describe(self):
+        if self.artifact is not None:
+            return self.artifact.describe()
+        if self.artifact_path and os.path.exists(self.artifact_path):
+            return f"{os.path.basename(self.artifact_path)} not loaded yet (loads on first identification)"
+        return "No model artifact installed, using placeholder predictions"
+
     def predict(self, image_path):
-        pests = ["Aphids", "Cutworms", "Powdery Mildew", "Leaf Rust"]
-        return random.choice(pests)
+        artifact = self.load()
+        if artifact is None:
+            pests = ["Aphids", "Cutworms", "Powdery Mildew", "Leaf Rust"]
+            return random.choice(pests)
+
+        # Linear classifier: weights is (classes, features), bias is (classes,)
+        artifact.touch()
+        weights = artifact.arrays["weights"]
+        bias = artifact.arrays["bias"]
+        features = self.image_features(image_path)
+        scores = [bias[c] + sum(weights[c, f] * x for f, x in enumerate(features))
+                  for c in range(weights.shape[0])]
+        return artifact.labels[scores.index(max(scores))]
+
+
+class ModelArtifact:
+    # Read-only view of a model file. Weight arrays are memoryviews straight
+    # onto a shared mmap, so every process loading the same file shares the
+    # same physical pages and nothing is copied until it is read.
+    def __init__(self, path):
+        start = time.perf_counter()
+
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self.map) < MODEL_HEADER.size:
+            raise ValueError(f"Not a model artifact: {path}")
+        magic, version, manifest_size = MODEL_HEADER.unpack_from(self.map)
+        if magic != MODEL_MAGIC:
+            raise ValueError(f"Not a model artifact: {path}")
+        if version != MODEL_FORMAT_VERSION:
+            raise ValueError(f"Unsupported model format version {version} in {path}")
+
+        manifest_end = MODEL_HEADER.size + manifest_size
+        if manifest_end > len(self.map):
+            raise ValueError(f"Corrupt model artifact {path}: manifest is truncated")
+        try:
+            self.manifest = json.loads(self.map[MODEL_HEADER.size:manifest_end].decode("utf-8"))
+        except ValueError:
+            raise ValueError(f"Corrupt model artifact {path}: manifest is not valid JSON")
+        missing = {"name", "version", "byteorder", "arrays"} - set(self.manifest)
+        if missing:
+            raise ValueError(f"Corrupt model artifact {path}: manifest lacks {', '.join(sorted(missing))}")
+        if self.manifest["byteorder"] != sys.byteorder:
+            raise ValueError(f"Model {path} was written for a {self.manifest['byteorder']}-endian machine")
+
+        self.path = path
+        self.name = self.manifest["name"]
+        self.version = self.manifest["version"]
+        self.labels = self.manifest.get("labels", [])
+
+        data_start = manifest_end + -manifest_end % MODEL_ALIGNMENT
+        view = memoryview(self.map)
+        self.arrays = {}
+        for name, spec in self.manifest["arrays"].items():
+            # Check every spec against the file before handing it to cast
+            try:
+                itemsize = array(spec["typecode"]).itemsize
+                count = 1
+                for dim in spec["shape"]:
+                    count *= dim
+                offset = data_start + spec["offset"]
+                nbytes = spec["nbytes"]
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Corrupt model artifact {path}: bad spec for array {name!r}")
+            if min(spec["shape"], default=0) < 0 or nbytes != count * itemsize:
+                raise ValueError(f"Corrupt model artifact {path}: array {name!r} size does not match its shape")
+            if spec["offset"] < 0 or offset + nbytes > len(self.map):
+                raise ValueError(f"Corrupt model artifact {path}: array {name!r} runs past the end of the file")
+            self.arrays[name] = view[offset:offset + nbytes].cast(spec["typecode"], spec["shape"])
+
+        self.load_seconds = time.perf_counter() - start
+        self.mapped_bytes = len(self.map)
+        self.touched = False
+        self.resident_bytes = None
+
+    def touch(self):
+        # Mapping costs next to nothing; the weights only become resident as
+        # they are read. Fault every page in once and record what that cost.
+        if self.touched:
+            return
+        rss_before = resident_memory()
+        for position in range(0, len(self.map), mmap.PAGESIZE):
+            self.map[position]
+        self.touched = True
+        if rss_before is not None:
+            self.resident_bytes = resident_memory() - rss_before
+
+    def describe(self):
+        lines = [
+            f"{self.name} v{self.version} ({os.path.basename(self.path)}, format v{MODEL_FORMAT_VERSION})",
+            f"Loaded in {self.load_seconds * 1000:.2f} ms, {self.mapped_bytes / 1024:.1f} KB mapped read-only"
+        ]
+        if not self.touched:
+            lines.append("Weights not read yet")
+        elif self.resident_bytes is not None:
+            lines.append(f"Reading the weights grew resident memory by {self.resident_bytes / 1024:.1f} KB "
+                         f"(process total {resident_memory() / 1024 / 1024:.1f} MB)")
+        for name, data in self.arrays.items():
+            lines.append(f"  {name}: {data.format} {tuple(data.shape)}")
+        return "\n".join(lines)
+
+
+def write_model_artifact(path, name, version, arrays, labels=()):
+    # arrays maps a name to (array.array, shape)
+    manifest = {
+        "name": name,
+        "version": version,
+        "byteorder": sys.byteorder,
+        "labels": list(labels),
+        "arrays": {}
+    }
+
+    # Offsets are relative to the data section, which starts at the first
+    # aligned position after the manifest
+    offset = 0
+    for array_name, (data, shape) in arrays.items():
+        offset += -offset % MODEL_ALIGNMENT
+        manifest["arrays"][array_name] = {
+            "typecode": data.typecode,
+            "shape": list(shape),
+            "offset": offset,
+            "nbytes": len(data) * data.itemsize
+        }
+        offset += len(data) * data.itemsize
+    manifest_bytes = json.dumps(manifest).encode("utf-8")
+    data_start = MODEL_HEADER.size + len(manifest_bytes)
+    data_start += -data_start % MODEL_ALIGNMENT
+
+    with open(path, "wb") as f:
+        f.write(MODEL_HEADER.pack(MODEL_MAGIC, MODEL_FORMAT_VERSION, len(manifest_bytes)))
+        f.write(manifest_bytes)
+        for array_name, (data, shape) in arrays.items():
+            f.write(b"\0" * (data_start + manifest["arrays"][array_name]["offset"] - f.tell()))
+            data.tofile(f)
+
+
+def resident_memory():
+    # Resident set size in bytes where the OS exposes it cheaply, else None
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class ImageCache:
+    # LRU of decoded thumbnails and their PhotoImages, capped by an estimate
+    # of the bytes they hold. Decoding may run on a worker thread, but
+    # PhotoImages are only created and dropped on the Tk thread.
+    def __init__(self, budget=IMAGE_CACHE_BUDGET, size=THUMBNAIL_SIZE):
+        self.budget = budget
+        self.size = size
+        self.entries = OrderedDict()  # path -> [thumbnail, photo, nbytes]
+        self.nbytes = 0
+        self.current = None
+        self.protected = set()
+        self.pending = {}
+        self.executor = ThreadPoolExecutor(max_workers=2)
+
+    def decode(self, path):
+        img = Image.open(path)
+        img.draft("RGB", self.size)  # JPEGs can decode straight at reduced scale
+        img.thumbnail(self.size)
+        return img
+
+    def focus(self, path, neighbours):
+        # The image on screen and its neighbours are kept out of eviction
+        # while the neighbours decode in the background
+        self.current = path
+        self.protected = {path, *neighbours}
+        for neighbour in neighbours:
+            self.prefetch(neighbour)
+
+    def prefetch(self, path):
+        if path not in self.entries and path not in self.pending:
+            self.pending[path] = self.executor.submit(self.decode, path)
+
+    def collect(self):
+        for path, future in list(self.pending.items()):
+            if future.done():
+                del self.pending[path]
+                if future.exception() is None and path not in self.entries:
+                    self.put(path, future.result())
+
+    def put(self, path, thumbnail):
+        nbytes = thumbnail.width * thumbnail.height * len(thumbnail.getbands())
+        self.entries[path] = [thumbnail, None, nbytes]
+        if self.current in self.entries and path != self.current:
+            self.entries.move_to_end(self.current)  # new entries go just below it
+        self.nbytes += nbytes
+        self.evict()
+
+    def get_photo(self, path):
+        self.current = path
+        self.protected.add(path)
+        if path not in self.entries:
+            future = self.pending.pop(path, None)
+            self.put(path, future.result() if future else self.decode(path))
+        self.entries.move_to_end(path)
+
+        entry = self.entries[path]
+        if entry[1] is None:
+            # Tk keeps its own 32-bit copy of every PhotoImage
+            entry[1] = ImageTk.PhotoImage(entry[0])
+            entry[2] += entry[0].width * entry[0].height * 4
+            self.nbytes += entry[0].width * entry[0].height * 4
+            self.evict()
+        return entry[1]
+
+    def evict(self):
+        # Least recently viewed first, never the image on screen or its neighbours
+        for path in list(self.entries):
+            if self.nbytes <= self.budget:
+                break
+            if path not in self.protected:
+                self.nbytes -= self.entries.pop(path)[2]
+
+
+class AnalysisHistory:
+    # Append-only columnar log: one file per column, one fixed-width value per
+    # event, plus a string table for locations and labels. Rows are only ever
+    # appended in time order, so the timestamp column doubles as a sorted index.
+    COLUMNS = [
+        ("timestamp", "d"),
+        ("kind", "B"),
+        ("location", "I"),
+        ("label", "I"),
+        ("value", "f")
+    ]
+    INDEXED = ["kind", "location", "label"]
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.lock_file = self.lock()
+
+        self.columns = {name: array(code) for name, code in self.COLUMNS}
+        self.strings = []
+        self.string_ids = {}
+        self.indexes = {}
+        self.listeners = []
+
+        self.load()
+        self.counts = {kind: self.columns["kind"].count(i) for i, kind in enumerate(EVENT_KINDS)}
+
+        self.column_files = {name: open(self.column_path(name), "ab") for name, _ in self.COLUMNS}
+        self.strings_file = open(self.strings_path(), "a", encoding="utf-8", newline="\n")
+
+    def lock(self):
+        # One writer per directory, otherwise two instances would hand out
+        # conflicting string ids. The OS drops the lock if the process dies.
+        lock_file = open(os.path.join(self.directory, "lock"), "a+")
+        try:
+            if os.name == "nt":
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise HistoryLockedError(f"Analysis history at {self.directory} is in use by another instance")
+        return lock_file
+
+    def column_path(self, name):
+        return os.path.join(self.directory, f"{name}.col")
+
+    def strings_path(self):
+        return os.path.join(self.directory, "strings.txt")
+
+    def load(self):
+        if os.path.exists(self.strings_path()):
+            # Only "\n" separates entries; any "\r" belongs to the string. An
+            # entry without its "\n" was cut short and no row can refer to it.
+            with open(self.strings_path(), "rb") as f:
+                data = f.read()
+            complete = data[:data.rfind(b"\n") + 1]
+            for text in complete.decode("utf-8").split("\n")[:-1]:
+                self.intern(text, persist=False)
+            if len(complete) < len(data):
+                os.truncate(self.strings_path(), len(complete))
+
+        for name, _ in self.COLUMNS:
+            if os.path.exists(self.column_path(name)):
+                column = self.columns[name]
+                with open(self.column_path(name), "rb") as f:
+                    data = f.read()
+                column.frombytes(data[:len(data) - len(data) % column.itemsize])
+
+        # An interrupted append can leave some columns one row longer than
+        # others; drop the partial row so every column lines up again.
+        rows = min(len(column) for column in self.columns.values())
+        for name, column in self.columns.items():
+            if len(column) > rows:
+                del column[rows:]
+            if os.path.exists(self.column_path(name)):
+                os.truncate(self.column_path(name), rows * column.itemsize)
+
+    def intern(self, text, persist=True):
+        text = text.replace("\n", " ")
+        if text not in self.string_ids:
+            self.string_ids[text] = len(self.strings)
+            self.strings.append(text)
+            if persist:
+                self.strings_file.write(text + "\n")
+                self.strings_file.flush()
+        return self.string_ids[text]
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def __len__(self):
+        return len(self.columns["timestamp"])
+
+    def append(self, kind, location="", label="", value=float("nan"), timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        times = self.columns["timestamp"]
+        if times and timestamp < times[-1]:
+            timestamp = times[-1]  # clock went backwards; keep the column sorted
+
+        row = len(times)
+        values = {
+            "timestamp": timestamp,
+            "kind": EVENT_KINDS.index(kind),
+            "location": self.intern(location),
+            "label": self.intern(label),
+            "value": value
+        }
+        for name, code in self.COLUMNS:
+            self.columns[name].append(values[name])
+            array(code, [values[name]]).tofile(self.column_files[name])
+            self.column_files[name].flush()
+
+        for name, index in self.indexes.items():
+            index.setdefault(values[name], array("I")).append(row)
+        self.counts[kind] += 1
+
+        event = self.event(row)
+        for listener in self.listeners:
+            listener(event)
+        return event
+
+    def index(self, name):
+        # Built on first use so start-up only pays for the raw column reads
+        if name not in self.indexes:
+            column = self.columns[name]
+            keys = set(column)
+            index = {}
+            if column.typecode == "B":
+                # Byte columns: translate to a 0/1 mask per key, all in C
+                data = column.tobytes()
+                for key in keys:
+                    mask = data.translate(bytes(value == key for value in range(256)))
+                    index[key] = array("I", compress(range(len(column)), mask))
+            elif len(keys) <= 64:
+                # Few distinct values: one C-level pass per key beats a
+                # Python-level loop over every row
+                for key in keys:
+                    index[key] = array("I", compress(range(len(column)), map(key.__eq__, column)))
+            else:
+                for row, key in enumerate(column):
+                    index.setdefault(key, array("I")).append(row)
+            self.indexes[name] = index
+        return self.indexes[name]
+
+    def event(self, row):
+        return HistoryEvent(
+            self.columns["timestamp"][row],
+            EVENT_KINDS[self.columns["kind"][row]],
+            self.strings[self.columns["location"][row]],
+            self.strings[self.columns["label"][row]],
+            self.columns["value"][row]
+        )
+
+    def query(self, start=None, end=None, kind=None, location=None, label=None, limit=None):
+        times = self.columns["timestamp"]
+        lo = 0 if start is None else bisect.bisect_left(times, start)
+        hi = len(times) if end is None else bisect.bisect_right(times, end)
+
+        filters = {}
+        if kind is not None:
+            filters["kind"] = EVENT_KINDS.index(kind)
+        for name, text in (("location", location), ("label", label)):
+            if text is not None:
+                if text not in self.string_ids:
+                    return []
+                filters[name] = self.string_ids[text]
+
+        # Walk the smallest candidate row list and check the other filters
+        # against their columns directly
+        candidates = range(lo, hi)
+        chosen = None
+        for name, key in filters.items():
+            rows = self.index(name).get(key, array("I"))
+            rows = rows[bisect.bisect_left(rows, lo):bisect.bisect_left(rows, hi)]
+            if len(rows) < len(candidates):
+                candidates = rows
+                chosen = name
+        checks = [(self.columns[name], key) for name, key in filters.items() if name != chosen]
+
+        if checks:
+            rows = []
+            for row in reversed(candidates):
+                if all(column[row] == key for column, key in checks):
+                    rows.append(row)
+                    if limit is not None and len(rows) >= limit:
+                        break
+        else:
+            rows = candidates[::-1] if limit is None else candidates[:-limit - 1:-1]
+        return [self.event(row) for row in rows]
+
+    def close(self):
+        for f in self.column_files.values():
+            f.close()
+        self.strings_file.close()
+        self.lock_file.close()
+
+
+class HistoryLockedError(Exception):
+    pass
+
+
+class ReportWriter:
+    # Writes one farm record at a time so exports never hold the full report
+    # set. Output goes to a temporary file that only replaces the destination
+    # once the export has finished.
+    def __init__(self, path):
+        self.path = path
+        directory, name = os.path.split(os.path.abspath(path))
+        fd, self.temp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+        self.file = os.fdopen(fd, "w", encoding="utf-8", newline="")
+
+    def __enter__(self):
+        self.write_header()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.write_footer()
+            self.file.close()
+            os.chmod(self.temp_path, self.published_mode())
+            os.replace(self.temp_path, self.path)
+        else:
+            self.file.close()
+            os.remove(self.temp_path)
+
+    def published_mode(self):
+        # mkstemp files are owner-only; reports are shared, so keep the mode
+        # of the report being replaced or fall back to what open() would give
+        try:
+            return os.stat(self.path).st_mode & 0o777
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            return 0o666 & ~umask
+
+    def write_header(self):
+        pass
+
+    def write_footer(self):
+        pass
+
+    def write(self, record):
+        raise NotImplementedError
+
+
+class CsvReportWriter(ReportWriter):
+    def write_header(self):
+        self.writer = csv.DictWriter(self.file, fieldnames=EXPORT_FIELDS)
+        self.writer.writeheader()
+
+    def write(self, record):
+        row = dict(record)
+        row["suitable_crops"] = "; ".join(record["suitable_crops"])
+        row["recommended_crops"] = "; ".join(record["recommended_crops"])
+        self.writer.writerow(row)
+
+
+class JsonlReportWriter(ReportWriter):
+    def write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False, allow_nan=False) + "\n")
+
+
+class HtmlReportWriter(ReportWriter):
+    # Printable report: one page per farm, save as PDF from the browser
+    def write_header(self):
+        self.file.write(
+            "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+            "<title>Farm Advisory Reports</title><style>"
+            "body { font-family: 'Segoe UI', sans-serif; color: #2D3748; }"
+            "section { page-break-after: always; padding: 1em 0; border-bottom: 1px solid #CBD5E0; }"
+            "h2 { color: #3182CE; } pre { white-space: pre-wrap; font-family: inherit; }"
+            "</style></head><body>\n")
+
+    def write_footer(self):
+        self.file.write("</body></html>\n")
+
+    def write(self, record):
+        if record["error"]:
+            self.file.write(f"<section><h2>Farm {html.escape(str(record['farm_id']))}</h2>"
+                            f"<p>Could not analyze this farm: {html.escape(record['error'])}</p></section>\n")
+            return
+
+        rows = [
+            ("Location", record["location"]),
+            ("Soil Type", record["soil_type"]),
+            ("pH Level", f"{record['ph']:.1f} ({record['ph_status']})"),
+            ("pH Adjustment", record["ph_recommendation"]),
+            ("Fertilizer", record["fertilizer"]),
+            ("Suitable Crops", ", ".join(record["suitable_crops"]) or "None"),
+        ]
+        if record["season"]:
+            rows.append(("Season", record["season"]))
+            rows.append(("Recommended Crops", ", ".join(record["recommended_crops"]) or "None"))
+        if record["pest"]:
+            rows.append(("Pest/Disease", record["pest"]))
+            rows.append(("Solution", record["pest_solution"] or "Contact your extension officer"))
+            rows.append(("Prevention", record["pest_prevention"] or "-"))
+
+        self.file.write(f"<section><h2>Farm {html.escape(str(record['farm_id']))}</h2><table>\n")
+        for title, value in rows:
+            self.file.write(f"<tr><th align=\"left\">{html.escape(title)}</th><td>{html.escape(str(value))}</td></tr>\n")
+        self.file.write("</table>\n")
+        if record["forecast"]:
+            self.file.write(f"<h3>Weather Outlook</h3><pre>{html.escape(record['forecast'])}</pre>\n")
+        self.file.write("</section>\n")
+
+
+REPORT_WRITERS = {
+    ".csv": CsvReportWriter,
+    ".jsonl": JsonlReportWriter,
+    ".html": HtmlReportWriter,
+    ".htm": HtmlReportWriter
+}
+
+
+def read_farms(path):
+    # Streams farm rows: farm_id, location, soil_type, ph, season, image_path
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            yield row
+
+
+def render_farm_report(engine, farm):
+    if not farm.get("soil_type"):
+        raise ValueError("missing soil_type")
+    try:
+        ph = float(farm.get("ph") or 6.5)
+    except ValueError:
+        ph = math.nan
+    if not math.isfinite(ph):
+        raise ValueError(f"invalid ph {farm['ph']!r}")
+    season = farm.get("season") or ""
+    image_path = farm.get("image_path") or ""
+
+    soil = engine.analyze_soil(farm["soil_type"], ph)
+    advice = engine.crop_advice(farm.get("location", ""), farm["soil_type"], season, ph) if season else None
+    pest = engine.identify_pest(image_path) if image_path else None
+
+    return {
+        "farm_id": farm.get("farm_id", ""),
+        "location": farm.get("location", ""),
+        "soil_type": soil["soil_type"],
+        "ph": ph,
+        "season": season,
+        "ph_status": soil["ph_status"],
+        "ph_recommendation": soil["ph_recommendation"],
+        "fertilizer": soil["fertilizer"],
+        "suitable_crops": soil["suitable_crops"],
+        "recommended_crops": advice["crops"] if advice else [],
+        "forecast": advice["forecast"] if advice else "",
+        "pest": pest["pest"] if pest else "",
+        "pest_solution": pest["solution"] if pest else "",
+        "pest_prevention": pest["prevention"] if pest else "",
+        "error": ""
+    }
+
+
+def failed_farm_report(farm, error):
+    record = {field: "" for field in EXPORT_FIELDS}
+    record.update({
+        "farm_id": farm.get("farm_id") or "",
+        "location": farm.get("location") or "",
+        "soil_type": farm.get("soil_type") or "",
+        "ph": None,
+        "suitable_crops": [],
+        "recommended_crops": [],
+        "error": str(error) or type(error).__name__
+    })
+    return record
+
+
+_export_engine = None
+
+
+def _init_export_worker():
+    global _export_engine
+    _export_engine = AdvisoryEngine()
+
+
+def _render_export_chunk(farms):
+    # A bad row becomes an error record instead of failing the whole export
+    records = []
+    for farm in farms:
+        try:
+            records.append(render_farm_report(_export_engine, farm))
+        except Exception as e:
+            records.append(failed_farm_report(farm, e))
+    return records, _export_engine.pest_model.describe()
+
+
+def export_reports(farms, path, workers=None, chunk_size=EXPORT_CHUNK_SIZE):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in REPORT_WRITERS:
+        raise ValueError(f"Unsupported export format: {extension or path}")
+
+    workers = workers or os.cpu_count() or 1
+    farms = iter(farms)
+    pending = deque()
+    count = 0
+    errors = 0
+    model = None
+
+    # Chunks are rendered in worker processes and written in input order.
+    # Only a couple of chunks per worker are ever in flight, so memory stays
+    # flat no matter how many farms are exported.
+    with REPORT_WRITERS[extension](path) as writer, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_export_worker) as pool:
+        while True:
+            chunk = list(islice(farms, chunk_size))
+            if chunk:
+                pending.append(pool.submit(_render_export_chunk, chunk))
+            if pending and (not chunk or len(pending) >= workers * 2):
+                records, model = pending.popleft().result()
+                for record in records:
+                    writer.write(record)
+                    count += 1
+                    errors += bool(record["error"])
+            if not chunk and not pending:
+                break
+    return count, errors, model
 
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = FarmingAdvisorySystem(root)
-    root.mainloop()
\ No newline at end of file
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description="AI Farming Advisory System")
+    subparsers = parser.add_subparsers(dest="command")
+
+    export_parser = subparsers.add_parser("export", help="export advisory reports for a farm list")
+    export_parser.add_argument("farms", help="CSV with farm_id, location, soil_type, ph, season, image_path")
+    export_parser.add_argument("output", help="output file (.csv, .jsonl or .html)")
+    export_parser.add_argument("--workers", type=int, default=None, help="rendering processes")
+
+    def add_service_arguments(subparser):
+        subparser.add_argument("--latency", type=float, default=0.0, help="mean response delay in seconds")
+        subparser.add_argument("--jitter", type=float, default=0.0, help="+/- random delay in seconds")
+        subparser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 503")
+        subparser.add_argument("--recorded", help="JSON lines of recorded forecasts to serve")
+
+    serve_parser = subparsers.add_parser("serve-forecasts", help="run the local stand-in forecast service")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    add_service_arguments(serve_parser)
+
+    replay_parser = subparsers.add_parser("replay", help="replay a forecast request trace and report latency")
+    replay_parser.add_argument("trace", help="JSON lines of {\"location\": ..., \"period\": ...}")
+    replay_parser.add_argument("--url", help="forecast service to hit (default: start a local one)")
+    replay_parser.add_argument("--concurrency", type=int, default=8)
+    replay_parser.add_argument("--timeout", type=float, default=2.0)
+    replay_parser.add_argument("--retries", type=int, default=2)
+    add_service_arguments(replay_parser)
+
+    model_parser = subparsers.add_parser("model-info", help="load a model artifact and report its cost")
+    model_parser.add_argument("path", nargs="?", default=os.path.join(MODEL_DIR, "pest_model.bin"))
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        count, errors, model = export_reports(read_farms(args.farms), args.output, workers=args.workers)
+        print(f"Exported {count} farm reports to {args.output} ({errors} with errors)")
+        if model:
+            print(f"Pest model in the export workers: {model}")
+    elif args.command == "serve-forecasts":
+        server = ForecastServer((args.host, args.port), args.latency, args.jitter, args.error_rate, args.recorded)
+        print(f"Serving forecasts on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+    elif args.command == "replay":
+        server = None
+        url = args.url
+        if not url:
+            server = ForecastServer(("127.0.0.1", 0), args.latency, args.jitter, args.error_rate, args.recorded)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            url = server.url
+
+        client = ForecastClient(url, timeout=args.timeout, retries=args.retries, pool_size=args.concurrency)
+        engine = AdvisoryEngine(weather_model=WeatherModel(client))
+        stats = replay_trace(read_trace(args.trace), engine, args.concurrency)
+        if server:
+            server.shutdown()
+
+        print(f"{stats['requests']} requests in {stats['seconds']:.2f} s "
+              f"({stats['throughput']:.1f} req/s), {stats['errors']} errors")
+        print("Latency: " + ", ".join(f"{name} {stats[name] * 1000:.1f} ms"
+                                      for name in ("p50", "p90", "p99", "p999", "max")))
+    elif args.command == "model-info":
+        artifact = ModelArtifact(args.path)
+        artifact.touch()
+        print(artifact.describe())
+    else:
+        root = tk.Tk()
+        app = FarmingAdvisorySystem(root)
+        root.mainloop()
\ No newline at end of file
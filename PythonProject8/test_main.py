@@ -0,0 +1,424 @@
+import csv
+import http.client
+import json
+import os
+import threading
+import time
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+import main
+
+
+def write_history(directory, rows):
+    # Lays down a history directory in the on-disk format without going
+    # through append, so large logs can be built quickly
+    strings = ["", "Nairobi", "Kisumu", "Aphids", "Cutworms", "7-day"]
+    with open(os.path.join(directory, "strings.txt"), "wb") as f:
+        f.write("".join(text + "\n" for text in strings).encode("utf-8"))
+
+    columns = {
+        "timestamp": array("d", range(rows)),
+        "kind": array("B", (row % len(main.EVENT_KINDS) for row in range(rows))),
+        "location": array("I", (1 + row % 2 for row in range(rows))),
+        "label": array("I", (3 + row % 3 for row in range(rows))),
+        "value": array("f", [6.5]) * rows
+    }
+    for name, column in columns.items():
+        with open(os.path.join(directory, f"{name}.col"), "wb") as f:
+            column.tofile(f)
+
+
+def test_history_round_trip(tmp_path):
+    history = main.AnalysisHistory(str(tmp_path))
+    history.append("forecast", "Nai\rrobi", "7-day", timestamp=10)
+    history.append("pest", "Kisumu", "Aphids", timestamp=20)
+    history.append("soil", "", "Clay", 5.5, timestamp=30)
+    history.close()
+
+    history = main.AnalysisHistory(str(tmp_path))
+    events = history.query()
+    assert [(e.kind, e.location, e.label) for e in events] == [
+        ("soil", "", "Clay"),
+        ("pest", "Kisumu", "Aphids"),
+        ("forecast", "Nai\rrobi", "7-day")
+    ]
+    assert events[0].value == 5.5
+    assert history.counts == {"soil": 1, "forecast": 1, "pest": 1, "crop_advice": 0}
+
+    # Strings interned after a reload must not shift earlier ids
+    history.append("pest", "Eldoret", "Cutworms", timestamp=40)
+    history.close()
+    history = main.AnalysisHistory(str(tmp_path))
+    assert [(e.location, e.label) for e in history.query(kind="pest")] == [
+        ("Eldoret", "Cutworms"),
+        ("Kisumu", "Aphids")
+    ]
+    history.close()
+
+
+def test_history_drops_interrupted_writes(tmp_path):
+    history = main.AnalysisHistory(str(tmp_path))
+    history.append("soil", "", "Clay", 6.0, timestamp=1)
+    history.close()
+
+    # A crash mid-append: one column got a value, the string table half an entry
+    with open(os.path.join(tmp_path, "kind.col"), "ab") as f:
+        f.write(b"\x01")
+    with open(os.path.join(tmp_path, "strings.txt"), "ab") as f:
+        f.write(b"Kisu")
+
+    history = main.AnalysisHistory(str(tmp_path))
+    assert len(history) == 1
+    history.append("forecast", "Kisumu", "7-day", timestamp=2)
+    history.close()
+
+    history = main.AnalysisHistory(str(tmp_path))
+    assert [(e.kind, e.location, e.label) for e in history.query()] == [
+        ("forecast", "Kisumu", "7-day"),
+        ("soil", "", "Clay")
+    ]
+    history.close()
+
+
+def test_history_is_locked_to_one_instance(tmp_path):
+    history = main.AnalysisHistory(str(tmp_path))
+    with pytest.raises(main.HistoryLockedError):
+        main.AnalysisHistory(str(tmp_path))
+    history.close()
+    main.AnalysisHistory(str(tmp_path)).close()
+
+
+def test_history_queries_a_million_events_interactively(tmp_path):
+    rows = 1_000_000
+    write_history(str(tmp_path), rows)
+    history = main.AnalysisHistory(str(tmp_path))
+    assert len(history) == rows
+    assert history.counts["pest"] == rows // 4
+
+    queries = [
+        (dict(kind="pest", limit=100), 100),
+        (dict(kind="pest", start=500_000, end=500_099), 25),
+        (dict(location="Kisumu", limit=50), 50),
+        (dict(label="Aphids", kind="soil", start=900_000, end=900_119), 10),
+        (dict(start=10, end=19), 10)
+    ]
+    for query, expected in queries:
+        # The first run may build an index, later runs only walk it
+        for budget in (1.0, 0.05):
+            start = time.perf_counter()
+            events = history.query(**query)
+            elapsed = time.perf_counter() - start
+            assert len(events) == expected, query
+            assert elapsed < budget, (query, elapsed)
+
+    for event in history.query(label="Aphids", kind="soil", start=900_000, end=900_119):
+        assert (event.kind, event.label) == ("soil", "Aphids")
+        assert 900_000 <= event.timestamp <= 900_119
+    history.close()
+
+
+def test_export_records_bad_rows_instead_of_failing(tmp_path):
+    farms = [
+        {"farm_id": "1", "location": "Nairobi", "soil_type": "Clay", "ph": "5.5", "season": "", "image_path": ""},
+        {"farm_id": "2", "location": "Kisumu", "soil_type": "Loamy", "ph": "abc", "season": "", "image_path": ""},
+        {"farm_id": "3", "location": "Eldoret", "ph": "6.5"}
+    ]
+    for extension in (".csv", ".jsonl", ".html"):
+        path = str(tmp_path / f"reports{extension}")
+        assert main.export_reports(farms, path, workers=1)[:2] == (3, 2)
+        assert os.listdir(tmp_path).count(f"reports{extension}") == 1
+
+    with open(tmp_path / "reports.jsonl", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [record["farm_id"] for record in records] == ["1", "2", "3"]
+    assert records[0]["ph_status"] == "acidic (needs lime)"
+    assert records[0]["error"] == ""
+    assert records[1]["error"] == "invalid ph 'abc'"
+    assert records[2]["error"] == "missing soil_type"
+
+    with open(tmp_path / "reports.csv", encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["error"] for row in rows] == ["", "invalid ph 'abc'", "missing soil_type"]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_export_rejects_non_finite_ph(tmp_path):
+    farms = [{"farm_id": str(number), "soil_type": "Clay", "ph": ph}
+             for number, ph in enumerate(["nan", "inf", "-Infinity", "7.0"])]
+    path = tmp_path / "reports.jsonl"
+    assert main.export_reports(farms, str(path), workers=1)[:2] == (4, 3)
+
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [record["error"] for record in records] == [
+        "invalid ph 'nan'", "invalid ph 'inf'", "invalid ph '-Infinity'", ""
+    ]
+
+
+def test_export_publishes_shareable_files(tmp_path):
+    umask = os.umask(0o022)
+    try:
+        farms = [{"farm_id": "1", "soil_type": "Clay", "ph": "6.5"}]
+        for extension in (".csv", ".jsonl", ".html"):
+            path = tmp_path / f"reports{extension}"
+            main.export_reports(farms, str(path), workers=1)
+            assert os.stat(path).st_mode & 0o777 == 0o644
+
+        # Re-exporting keeps the mode the existing report was given
+        path = tmp_path / "reports.csv"
+        os.chmod(path, 0o640)
+        main.export_reports(farms, str(path), workers=1)
+        assert os.stat(path).st_mode & 0o777 == 0o640
+    finally:
+        os.umask(umask)
+
+
+def test_failed_export_leaves_destination_untouched(tmp_path):
+    path = tmp_path / "reports.csv"
+    path.write_text("previous export", encoding="utf-8")
+
+    def farms():
+        yield {"farm_id": "1", "soil_type": "Clay", "ph": "6.5"}
+        raise OSError("farm list went away")
+
+    with pytest.raises(OSError):
+        main.export_reports(farms(), str(path), workers=1, chunk_size=1)
+    assert path.read_text(encoding="utf-8") == "previous export"
+    assert os.listdir(tmp_path) == ["reports.csv"]
+
+
+def test_image_cache_keeps_prefetched_neighbours_at_budget(tmp_path, monkeypatch):
+    # A real PhotoImage needs a Tk display
+    monkeypatch.setattr(main.ImageTk, "PhotoImage", lambda image: ("photo", image.size))
+    paths = []
+    for number in range(8):
+        path = str(tmp_path / f"photo{number}.png")
+        Image.new("RGB", (600, 600), (number * 30, 120, 60)).save(path)
+        paths.append(path)
+
+    # Room for the current and previous image with their PhotoImages, plus
+    # the prefetched next thumbnail
+    cache = main.ImageCache(budget=300 * 300 * (7 + 7 + 3))
+    for number in range(1, len(paths) - 1):
+        current = paths[number]
+        neighbours = [paths[number - 1], paths[number + 1]]
+        cache.focus(current, neighbours)
+        assert cache.get_photo(current) == ("photo", (300, 300))
+        for future in list(cache.pending.values()):
+            future.result()
+        cache.collect()
+
+        assert set(cache.entries) == {current, *neighbours}
+        assert cache.nbytes <= cache.budget
+
+
+def write_pest_artifact(path):
+    weights = array("f", [0.1 * value for value in range(24)])
+    bias = array("f", [0.0, 0.5, 1.0, 1.5])
+    main.write_model_artifact(path, "pest-classifier", "1.0",
+                              {"weights": (weights, (4, 6)), "bias": (bias, (4,))},
+                              labels=["Aphids", "Cutworms", "Powdery Mildew", "Leaf Rust"])
+
+
+def test_model_artifact_round_trip(tmp_path):
+    path = str(tmp_path / "pest_model.bin")
+    write_pest_artifact(path)
+
+    artifact = main.ModelArtifact(path)
+    assert (artifact.name, artifact.version) == ("pest-classifier", "1.0")
+    assert artifact.arrays["weights"].shape == (4, 6)
+    assert artifact.arrays["weights"][1, 2] == pytest.approx(0.8)
+    assert artifact.arrays["bias"].tolist() == [0.0, 0.5, 1.0, 1.5]
+    with pytest.raises(TypeError):
+        artifact.arrays["bias"][0] = 2.0  # mapped read-only
+
+
+def test_model_reports_resident_cost_after_first_prediction(tmp_path):
+    path = str(tmp_path / "pest_model.bin")
+    weights = array("f", [0.0]) * (4 * 6 * 4096)  # 384 KB, well past a page
+    main.write_model_artifact(path, "pest-classifier", "1.0",
+                              {"weights": (weights, (4, 6 * 4096)), "bias": (array("f", [0.0] * 4), (4,))},
+                              labels=["Aphids", "Cutworms", "Powdery Mildew", "Leaf Rust"])
+    model = main.PestModel(path)
+    assert "not loaded yet" in model.describe()
+
+    artifact = model.load()
+    assert artifact.resident_bytes is None
+    assert "Weights not read yet" in model.describe()
+
+    artifact.touch()
+    assert "grew resident memory" in model.describe()
+    if main.resident_memory() is not None:
+        assert artifact.resident_bytes >= 256 * 1024
+    assert "placeholder" in main.PestModel(str(tmp_path / "missing.bin")).describe()
+
+    # Predicting is what reads the weights in the app and the export workers
+    path = str(tmp_path / "small_model.bin")
+    write_pest_artifact(path)
+    image = str(tmp_path / "leaf.png")
+    Image.new("RGB", (32, 32), (40, 160, 40)).save(image)
+    model = main.PestModel(path)
+    assert model.predict(image) in model.artifact.labels
+    assert model.artifact.touched
+
+
+def test_model_artifact_rejects_corrupt_files(tmp_path):
+    path = tmp_path / "pest_model.bin"
+    write_pest_artifact(str(path))
+    data = path.read_bytes()
+
+    # Truncated weights
+    path.write_bytes(data[:-8])
+    with pytest.raises(ValueError, match="past the end"):
+        main.ModelArtifact(str(path))
+
+    # Array size disagreeing with its shape
+    magic, version, manifest_size = main.MODEL_HEADER.unpack_from(data)
+    start = main.MODEL_HEADER.size
+    manifest = json.loads(data[start:start + manifest_size])
+    manifest["arrays"]["bias"]["shape"] = [5]
+    manifest_bytes = json.dumps(manifest).encode("utf-8").ljust(manifest_size)
+    path.write_bytes(data[:start] + manifest_bytes + data[start + manifest_size:])
+    with pytest.raises(ValueError, match="does not match"):
+        main.ModelArtifact(str(path))
+
+    # Truncated manifest
+    path.write_bytes(data[:start + 10])
+    with pytest.raises(ValueError, match="Corrupt model artifact"):
+        main.ModelArtifact(str(path))
+
+
+def test_fertilizer_recommendation_ignores_ph():
+    # soil_batch_tables reduces fertilizer to a per-soil lookup
+    engine = main.AdvisoryEngine()
+    for soil in engine.soil_types + ["", "Unknown"]:
+        expected = engine.get_fertilizer_recommendation(soil, None)
+        for tenth in range(0, 141):
+            assert engine.get_fertilizer_recommendation(soil, tenth / 10) == expected
+
+
+def test_batch_soil_analysis_matches_scalar_path():
+    np = pytest.importorskip("numpy")
+    engine = main.AdvisoryEngine()
+    tables = engine.soil_batch_tables()
+
+    rng = np.random.default_rng(0)
+    samples = 200_000
+    ph = np.round(rng.uniform(3, 10, samples), 1)
+    ph[:8] = [6.0, 7.5, np.nan, 5.999, 7.5001, -np.inf, np.inf, 0.0]
+    soil_codes = rng.integers(-2, len(engine.soil_types) + 2, samples)
+
+    result = engine.analyze_soil_batch(ph, soil_codes)
+    for row in range(samples):
+        code = soil_codes[row]
+        soil = engine.soil_types[code] if 0 <= code < len(engine.soil_types) else "Unknown"
+        expected = engine.analyze_soil(soil, float(ph[row]))
+        mask = int(result["suitable_crops"][row])
+        assert (
+            tables["ph_statuses"][result["ph_status"][row]],
+            tables["ph_recommendations"][result["ph_recommendation"][row]],
+            tables["fertilizers"][result["fertilizer"][row]],
+            [crop for bit, crop in enumerate(tables["crops"]) if mask >> bit & 1]
+        ) == (
+            expected["ph_status"],
+            expected["ph_recommendation"],
+            expected["fertilizer"],
+            expected["suitable_crops"]
+        ), (soil, ph[row])
+
+
+@pytest.fixture
+def forecast_server():
+    server = main.ForecastServer(("127.0.0.1", 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_replay_counts_bad_requests_as_errors(tmp_path, forecast_server):
+    trace = tmp_path / "trace.jsonl"
+    trace.write_text("\n".join([
+        '{"location": "Nairobi", "period": "7-day"}',
+        '{"location": "Nairobi"}',
+        'not json',
+        '{"location": "Kisumu", "period": "Seasonal"}'
+    ]), encoding="utf-8")
+
+    engine = main.AdvisoryEngine(weather_model=main.WeatherModel(main.ForecastClient(forecast_server.url)))
+    stats = main.replay_trace(main.read_trace(str(trace)), engine, concurrency=1)
+    assert (stats["requests"], stats["errors"]) == (4, 2)
+
+
+def test_malformed_forecasts_raise_forecast_error(tmp_path):
+    recorded = tmp_path / "recorded.jsonl"
+    recorded.write_text('{"location": "Nairobi", "period": "7-day", "temps": [20]}\n', encoding="utf-8")
+    server = main.ForecastServer(("127.0.0.1", 0), recorded=str(recorded))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        model = main.WeatherModel(main.ForecastClient(server.url))
+        with pytest.raises(main.ForecastError, match="Malformed"):
+            model.predict("Nairobi", "7-day")
+        assert model.predict("Kisumu", "7-day").startswith("Weather forecast for Kisumu")
+
+        stats = main.replay_trace([{"location": "Nairobi", "period": "7-day"}] * 3,
+                                  main.AdvisoryEngine(weather_model=model), concurrency=2)
+        assert (stats["requests"], stats["errors"]) == (3, 3)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_invalid_json_raises_forecast_error():
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "8")
+            self.end_headers()
+            self.wfile.write(b"not json")
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = main.ForecastClient(f"http://127.0.0.1:{server.server_address[1]}")
+        with pytest.raises(main.ForecastError, match="invalid JSON"):
+            client.get_forecast("Nairobi", "7-day")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_forecast_client_replaces_connections_closed_while_idle():
+    class IdleClosingHandler(main.ForecastRequestHandler):
+        timeout = 0.2  # drop keep-alive connections idle this long
+
+    server = main.ForecastServer(("127.0.0.1", 0))
+    server.RequestHandlerClass = IdleClosingHandler
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = main.ForecastClient(server.url, retries=0)
+        with main.ThreadPoolExecutor(3) as pool:
+            for forecast in pool.map(lambda _: client.get_forecast("Nairobi", "7-day"), range(3)):
+                assert forecast["location"] == "Nairobi"
+        assert client.pool.qsize() >= 1
+
+        time.sleep(0.5)  # the server closes every pooled connection
+        for _ in range(2):
+            assert client.get_forecast("Kisumu", "7-day")["location"] == "Kisumu"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_forecast_client_honours_url_scheme():
+    assert main.ForecastClient("https://forecasts.example").connection_class is http.client.HTTPSConnection
+    assert main.ForecastClient("http://127.0.0.1:8765").connection_class is http.client.HTTPConnection
+    with pytest.raises(ValueError):
+        main.ForecastClient("ftp://forecasts.example")